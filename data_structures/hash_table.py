@@ -7,7 +7,7 @@ __author__ = 'Jackson Goerner'
 __since__ = '07/02/2023'
 
 
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterator
 from data_structures.referential_array import ArrayR
 
 K = TypeVar('K')
@@ -53,9 +53,12 @@ class LinearProbeTable(Generic[K, V]):
 
         value = 0
         a = 31415
+        table_size = self.table_size
+        a_mod = table_size - 1
+        hash_base = self.HASH_BASE
         for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
+            value = (ord(char) + a * value) % table_size
+            a = a * hash_base % a_mod
         return value
 
     @property
@@ -122,6 +125,16 @@ class LinearProbeTable(Generic[K, V]):
                 res.append(self.array[x][1])
         return res
 
+    def __iter__(self) -> Iterator[tuple[K, V]]:
+        """
+        Iterates over all (key, value) pairs in the hash table (no particular order).
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        for item in self.array:
+            if item is not None:
+                yield item
+
     def __contains__(self, key: K) -> bool:
         """
         Checks to see if the given key is in the Hash Table
@@ -1,13 +1,87 @@
 from __future__ import annotations
 
-from typing import Generic, TypeVar, Iterator
+from operator import mul
+from typing import Final, Generic, TypeVar, Iterator
 from data_structures.hash_table import LinearProbeTable, FullError
-from data_structures.referential_array import ArrayR
 
 K1 = TypeVar('K1')
 K2 = TypeVar('K2')
 V = TypeVar('V')
 
+# Tag bytes for top-level slots. Occupied slots use the low 7 bits of hash1 with the top bit set.
+EMPTY_TAG: Final[int] = 0
+TOMBSTONE_TAG: Final[int] = 1
+
+# Keys longer than this are hashed as a dot product with precomputed powers instead of a per-character loop.
+LONG_KEY_LENGTH: Final[int] = 16
+
+# hash_base -> [hash_base**0, hash_base**1, ...], each reduced to 32 bits. Extended on demand.
+_hash_powers: dict[int, list[int]] = {}
+
+
+def _powers(hash_base: int, length: int) -> list[int]:
+    """
+    Return at least `length` ascending powers of hash_base modulo 2**32.
+
+    :complexity: O(1) amortised, O(length) when the cache has to grow.
+    """
+    powers = _hash_powers.setdefault(hash_base, [1])
+    while len(powers) < length:
+        powers.append(powers[-1] * hash_base & 0xFFFFFFFF)
+    return powers
+
+
+def _poly_hash(key: str, table_size: int, hash_base: int) -> int:
+    """
+    Polynomial string hash shared by `hash1` and `hash2`.
+
+    The polynomial is accumulated in 32 bits with a mask instead of a modulo per
+    character, then mixed with an xor-shift avalanche so that the low bits depend
+    on every character. Power-of-two table sizes keep only those low bits,
+    any other size falls back to a single modulo.
+
+    Long ASCII keys evaluate the same polynomial as sum(c_i * hash_base**(L-1-i)),
+    a dot product of the key's bytes with the cached powers done by builtins in C.
+
+    :complexity: O(len(key))
+    """
+    length = len(key)
+    if length > LONG_KEY_LENGTH and key.isascii():
+        # Descending powers hash_base**(L-1) ... hash_base**0.
+        descending = _powers(hash_base, length)[length - 1::-1]
+        value = sum(map(mul, key.encode(), descending)) & 0xFFFFFFFF
+    else:
+        value = 0
+        for char in key:
+            value = (value * hash_base + ord(char)) & 0xFFFFFFFF
+    value ^= value >> 16
+    value = (value * 0x45D9F3B) & 0xFFFFFFFF
+    value ^= value >> 16
+    if table_size & (table_size - 1) == 0:
+        return value & (table_size - 1)
+    return value % table_size
+
+
+class _InnerTable(LinearProbeTable[K2, V]):
+    """
+    Bottom-level table of a DoubleKeyTable, hashing its keys with the owner's `hash2`.
+    """
+
+    def __init__(self, owner: DoubleKeyTable, sizes: list[int] | None = None) -> None:
+        """
+        Initialise the bottom-level table for its owning DoubleKeyTable.
+        """
+        LinearProbeTable.__init__(self, sizes)
+        self.owner = owner
+
+    def hash(self, key: K2) -> int:
+        """
+        Hash a key through the owner's `hash2`, so overriding `hash2` on the owner still applies.
+
+        :complexity: O(hash2(key))
+        """
+        return self.owner.hash2(key, self)
+
 
 class DoubleKeyTable(Generic[K1, K2, V]):
     """
@@ -24,12 +98,13 @@ class DoubleKeyTable(Generic[K1, K2, V]):
     """
 
     # No test case should exceed 1 million entries.
-    TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241,
-                   786433, 1572869]
+    # Powers of two, so positions can be reduced with a bitmask rather than a modulo.
+    TABLE_SIZES: list[int] = [1 << 3, 1 << 4, 1 << 5, 1 << 6, 1 << 7, 1 << 8, 1 << 9, 1 << 10, 1 << 11, 1 << 12,
+                              1 << 13, 1 << 14, 1 << 15, 1 << 16, 1 << 17, 1 << 18, 1 << 19, 1 << 20, 1 << 21]
 
-    HASH_BASE = 31
+    HASH_BASE: int = 31
 
-    def __init__(self, sizes: list | None = None, internal_sizes: list | None = None) -> None:
+    def __init__(self, sizes: list[int] | None = None, internal_sizes: list[int] | None = None) -> None:
         """
         Initialise the DoubleKeyTable.
 
@@ -40,10 +115,15 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         """
         if sizes is not None:
             self.TABLE_SIZES = sizes
-        self.size_index = 0
-        self.table = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
-        self.internal_sizes = internal_sizes
+        self.size_index: int = 0
+        # A plain list rather than ArrayR, so every probe step is a C-level index.
+        self.table: list[tuple[K1, LinearProbeTable[K2, V]] | None] = [None] * self.TABLE_SIZES[self.size_index]
+        # One tag byte per slot, see EMPTY_TAG / TOMBSTONE_TAG.
+        # Probing compares tags first and only looks at a slot's key when the tag matches.
+        self.tags: bytearray = bytearray(len(self.table))
+        self.count: int = 0
+        self.tombstones: int = 0
+        self.internal_sizes: list[int] | None = internal_sizes
 
     def hash1(self, key: K1) -> int:
         """
@@ -51,13 +131,7 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
         :complexity: O(len(key1))
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        return _poly_hash(key, len(self.table), self.HASH_BASE)
 
     def hash2(self, key: K2, sub_table: LinearProbeTable[K2, V]) -> int:
         """
@@ -65,20 +139,17 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
         :complexity: O(len(key2))
         """
+        return _poly_hash(key, sub_table.table_size, self.HASH_BASE)
 
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % sub_table.table_size
-            a = a * self.HASH_BASE % (sub_table.table_size - 1)
-        return value
-
-    def _linear_probe(self, key1: K1, key2: K2, is_insert: bool) -> tuple[int, int]:
+    def _probe_top(self, key1: K1, is_insert: bool) -> int:
         """
-        Find the correct position for this key in the hash table using linear probing.
+        Find the correct position for the 1st key in the top-level table using linear probing.
+        Tombstones left by deletes are skipped over, since key1 may sit further along the chain.
+        When inserting a new key1, its bottom-level table is created in the first tombstone passed,
+        or otherwise in the empty slot that ended the search.
 
-        :raises KeyError:e When the key pair is not in the table, but is_insert is False.
-        :raises FullError: When a table is full and cannot be inserted.
+        :raises KeyError: When key1 is not in the table, but is_insert is False.
+        :raises FullError: When the table is full and cannot be inserted.
 
         Complexity:
         - Worst case: O(hash1(key1) + N*comp(key1)), when we've searched the entire table
@@ -86,32 +157,63 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         - Best case: O(hash1(key1)), when first position is empty
 
         """
+        table = self.table
+        tags = self.tags
+        table_size = len(table)
         pos1 = self.hash1(key1)
+        tag = (pos1 & 0x7F) | 0x80
+        first_tombstone = -1
 
-        for _ in range(self.table_size):
-            if self.table[pos1] is None:
-                if is_insert:
-                    linear_probe_table = LinearProbeTable(self.internal_sizes)
-                    linear_probe_table.hash = lambda k: self.hash2(k, linear_probe_table)
-                    self.table[pos1] = (key1, linear_probe_table)
-                    pos2 = linear_probe_table._linear_probe(key2, is_insert)
-                    self.count += 1
-                    return pos1, pos2
-                else:
-                    raise KeyError("key pair is not in the table")
-
-            elif self.table[pos1][0] == key1:
-                linear_probe_table = self.table[pos1][1]
-                pos2 = linear_probe_table._linear_probe(key2, is_insert)
-                return pos1, pos2
+        for _ in range(table_size):
+            slot_tag = tags[pos1]
+            if slot_tag == EMPTY_TAG:
+                break
 
-            else:
-                pos1 = (pos1 + 1) % self.table_size
+            elif slot_tag == TOMBSTONE_TAG:
+                if first_tombstone == -1:
+                    first_tombstone = pos1
+
+            elif slot_tag == tag and table[pos1][0] == key1:
+                return pos1
+
+            pos1 += 1
+            if pos1 == table_size:
+                pos1 = 0
 
-        if is_insert:
-            raise FullError("Table is full!")
         else:
-            raise KeyError("key pair is not in the table")
+            # Searched the entire table without finding an empty slot.
+            if first_tombstone == -1:
+                if is_insert:
+                    raise FullError("Table is full!")
+                raise KeyError(key1)
+
+        if not is_insert:
+            raise KeyError(key1)
+
+        if first_tombstone != -1:
+            pos1 = first_tombstone
+            self.tombstones -= 1
+        table[pos1] = (key1, _InnerTable(self, self.internal_sizes))
+        tags[pos1] = tag
+        self.count += 1
+        return pos1
+
+    def _linear_probe(self, key1: K1, key2: K2, is_insert: bool) -> tuple[int, int]:
+        """
+        Find the correct position for this key in the hash table using linear probing.
+
+        :raises KeyError: When the key pair is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+
+        Complexity:
+        - Worst case: O(_probe_top(key1) + hash2(key2) + M*comp(key2)), when we've searched the entire
+                      bottom-level table where M is its size
+        - Best case: O(hash1(key1) + hash2(key2)), when both first positions are empty
+
+        """
+        pos1 = self._probe_top(key1, is_insert)
+        pos2 = self.table[pos1][1]._linear_probe(key2, is_insert)
+        return pos1, pos2
 
     def iter_keys(self, key: K1 | None = None) -> Iterator[K1 | K2]:
         """
@@ -121,49 +223,46 @@ class DoubleKeyTable(Generic[K1, K2, V]):
             Returns an iterator of all keys in the bottom-hash-table for k.
 
         Complexity:
-        - Worst case: O(n * m), when key is None,all positions are occupied where n is self.table_size and m is
-                      linear_probe_table.table_size.
+        - Worst case: O(n), when key is None, where n is self.table_size.
+                      O(_probe_top(k) + m) when key is k, where m is the size of k's bottom-level table.
         - Best case: O(1), when the table is empty or the specified key doesn't exist in the table.
 
         """
+        table = self.table
         if key is None:
-            for x in range(self.table_size):
-                if self.table[x] is not None:
-                    yield self.table[x][0]
+            yield from (item[0] for item in table if item is not None)
 
         else:
-            for x in range(self.table_size):
-                if self.table[x] is not None:
-                    if self.table[x][0] == key:
-                        linear_probe_table = self.table[x][1]
-
-                        for y in range(linear_probe_table.table_size):
-                            if linear_probe_table.array[y] is not None:
-                                yield linear_probe_table.array[y][0]
+            try:
+                pos1 = self._probe_top(key, False)
+            except KeyError:
+                return
+            yield from (key2 for key2, _ in table[pos1][1])
 
-    def keys(self, key: K1 | None = None) -> list[K1]:
+    def keys(self, key: K1 | None = None) -> list[K1 | K2]:
         """
         key = None: returns all top-level keys in the table.
-        key = x: returns all bottom-level keys for top-level key x.
+        key = x: returns all bottom-level keys for top-level key x, or [] if x is not in the table.
 
         Complexity:
-        - Worst case: O(n * m), when key is None,all positions are occupied where n is self.table_size and m is
-                      linear_probe_table.table_size.
-        - Best case: O(1), when the table is empty or the specified key doesn't exist in the table.
+        - Worst case: O(n), when key is None, where n is self.table_size.
+                      O(_probe_top(x) + m) when key is x, where m is the size of x's bottom-level table.
+        - Best case: O(hash1(x) + m), when x is found at its first probed position.
 
         """
-        res: list = []
+        res: list[K1 | K2] = []
+        table = self.table
         if key is None:
-            for x in range(self.table_size):
-                if self.table[x] is not None:
-                    res.append(self.table[x][0])
+            for item in table:
+                if item is not None:
+                    res.append(item[0])
 
         else:
-            for x in range(self.table_size):
-                if self.table[x] is not None:
-                    if self.table[x][0] == key:
-                        linear_probe_table = self.table[x][1]
-                        return linear_probe_table.keys()
+            try:
+                pos1 = self._probe_top(key, False)
+            except KeyError:
+                return res
+            return table[pos1][1].keys()
 
         return res
 
@@ -174,56 +273,68 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         key = k:
             Returns an iterator of all values in the bottom-hash-table for k.
 
+        :raises KeyError: when k is not in the table.
+
         Complexity:
         - Worst case: O(n * m), when key is None,all positions are occupied where n is self.table_size and m is
                       linear_probe_table.table_size.
-        - Best case: O(1), when the table is empty or the specified key doesn't exist in the table.
+                      O(_probe_top(k) + m) when key is k.
+        - Best case: O(1), when the table is empty.
 
         """
+        table = self.table
         if key is None:
-            for x in range(self.table_size):
-                if self.table[x] is not None:
-                    linear_probe_table = self.table[x][1]
-
-                    for y in range(linear_probe_table.table_size):
-                        if linear_probe_table.array[y] is not None:
-                            yield linear_probe_table.array[y][1]
+            for item in table:
+                if item is not None:
+                    yield from (value for _, value in item[1])
 
         else:
-            pos1 = self.hash1(key)
-            linear_probe_table = self.table[pos1][1]
-
-            for y in range(linear_probe_table.table_size):
-                if linear_probe_table.array[y] is not None:
-                    yield linear_probe_table.array[y][1]
+            pos1 = self._probe_top(key, False)
+            yield from (value for _, value in table[pos1][1])
 
     def values(self, key: K1 | None = None) -> list[V]:
         """
         key = None: returns all values in the table.
         key = x: returns all values for top-level key x.
 
+        :raises KeyError: when x is not in the table.
+
         Complexity:
         - Worst case: O(n * m), when key is None,all positions are occupied where n is self.table_size and m is
                       linear_probe_table.table_size.
-        - Best case: O(1), when the table is empty or the specified key doesn't exist in the table.
+                      O(_probe_top(x) + m) when key is x.
+        - Best case: O(1), when the table is empty.
 
             """
-        res: list = []
+        res: list[V] = []
+        table = self.table
         if key is None:
-            for x in range(self.table_size):
-                if self.table[x] is not None:
-                    linear_probe_table = self.table[x][1]
-
-                    for y in range(linear_probe_table.table_size):
-                        if linear_probe_table.array[y] is not None:
-                            res.append(linear_probe_table.array[y][1])
+            for item in table:
+                if item is not None:
+                    res.extend(value for _, value in item[1])
 
         else:
-            pos1 = self.hash1(key)
-            linear_probe_table = self.table[pos1][1]
-            return linear_probe_table.values()
+            pos1 = self._probe_top(key, False)
+            return table[pos1][1].values()
         return res
 
+    def items_by_outer(self) -> Iterator[tuple[K1, list[V]]]:
+        """
+        Returns an iterator of (key1, values) pairs, one per top-level key,
+        where values are all the values stored under key1.
+
+        The top-level table is walked once, rather than once for the keys and then probed again per key.
+
+        Complexity:
+        - Worst case: O(n * m), when all positions are occupied where n is self.table_size and m is
+                      linear_probe_table.table_size.
+        - Best case: O(n), when the table is empty.
+
+        """
+        for item in self.table:
+            if item is not None:
+                yield item[0], item[1].values()
+
     def __contains__(self, key: tuple[K1, K2]) -> bool:
         """
         Checks to see if the given key is in the Hash Table
@@ -245,8 +356,8 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         :raises KeyError: when the key doesn't exist.
         """
         key1, key2 = key
-        int1, int2 = self._linear_probe(key1, key2, False)
-        return self.table[int1][1][int2][1]
+        pos1 = self._probe_top(key1, False)
+        return self.table[pos1][1][key2]
 
     def __setitem__(self, key: tuple[K1, K2], data: V) -> None:
         """
@@ -255,12 +366,15 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         :complexity: See linear probe.
         """
         key1, key2 = key
-        pos1, pos2 = self._linear_probe(key1, key2, True)
+        pos1 = self._probe_top(key1, True)
 
         self.table[pos1][1][key2] = data
 
         if len(self) > self.table_size / 2:
             self._rehash()
+        elif len(self) + self.tombstones > self.table_size / 2:
+            # Mostly tombstones rather than keys, so clear them out without growing.
+            self._rehash(grow=False)
 
     def __delitem__(self, key: tuple[K1, K2]) -> None:
         """
@@ -269,7 +383,7 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         :raises KeyError: when the key doesn't exist.
 
         Complexity:
-        - Worst case: O(N*hash1(key1)+N^2*comp(key1)), when deleting item is midway through large chain.
+        - Worst case: O(_linear_probe(key1, key2)), when the bottom-level delete is the costly part.
         - Best case: O(hash1(key1)), when deleting item is not probed and in correct spot.
 
         """
@@ -277,48 +391,68 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         int1, int2 = self._linear_probe(key1, key2, False)
         # Remove the element
         if len(self.table[int1][1]) == 1:
+            # Leave a tombstone so that keys further along the chain can still be found.
             self.table[int1] = None
+            self.tags[int1] = TOMBSTONE_TAG
             self.count -= 1
-            int1 = (int1 + 1) % self.table_size
-
-            while self.table[int1] is not None:
-                key1_ = self.table[int1][0]
-                key_, value_ = self.table[int1]
-                self.table[int1] = None
-                # Reinsert.
-                int1_, int2_ = self._linear_probe(key1_, key_, True)
-                # print(int1_)
-                self.table[int1_] = (key_, value_)
-                int1 = (int1 + 1) % self.table_size
+            self.tombstones += 1
 
         else:
             linear_probe_table = self.table[int1][1]
             linear_probe_table.__delitem__(key2)
 
-    def _rehash(self) -> None:
+    def _rehash_insert(self, key1: K1, linear_probe_table: LinearProbeTable[K2, V]) -> None:
         """
-        Need to resize table and reinsert all values
+        Place an existing (key1, bottom-level table) pair into the table while rehashing.
+
+        The keys being moved are already unique and the new table is large enough to hold them,
+        so no key comparisons, count updates or load factor checks are needed.
+
+        Complexity:
+        - Worst case: O(hash1(key1) + N), when we've walked a cluster spanning the whole table
+                      where N is the size of the hash table
+        - Best case: O(hash1(key1)), when first position is empty
+
+        """
+        table = self.table
+        tags = self.tags
+        table_size = len(table)
+        pos1 = self.hash1(key1)
+        tag = (pos1 & 0x7F) | 0x80
+        while tags[pos1] != EMPTY_TAG:
+            pos1 += 1
+            if pos1 == table_size:
+                pos1 = 0
+        table[pos1] = (key1, linear_probe_table)
+        tags[pos1] = tag
+
+    def _rehash(self, grow: bool = True) -> None:
+        """
+        Need to resize table and reinsert all values.
+        With grow=False the table keeps its size, which just clears out the tombstones.
+        The bottom-level tables are moved across as they are, so only the top-level keys are rehashed.
 
         Complexity:
-        - Worst case: O(N*hash1(key1) + N^2*comp(key1)), where N is len(self). Lots of probing.
+        - Worst case: O(N*hash1(key1) + N^2), where N is len(self). Lots of probing.
         - Best case: O(N*hash1(key1)), No probing.
 
         """
         old_table = self.table
-        self.size_index += 1
-        if self.size_index == len(self.TABLE_SIZES):
-            # Cannot be resized further.
-            return
-        self.table = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
+        if grow:
+            if self.size_index + 1 == len(self.TABLE_SIZES):
+                # Cannot be resized further, but tombstones can still be cleared.
+                if self.tombstones == 0:
+                    return
+            else:
+                self.size_index += 1
+        self.table = [None] * self.TABLE_SIZES[self.size_index]
+        self.tags = bytearray(len(self.table))
+        self.tombstones = 0
 
         for item in old_table:
             if item is not None:
                 key1, linear_probe_table = item
-                for y in range(linear_probe_table.table_size):
-                    if linear_probe_table.array[y] is not None:
-                        key2, value = linear_probe_table.array[y]
-                        self[key1, key2] = value
+                self._rehash_insert(key1, linear_probe_table)
 
     @property
     def table_size(self) -> int:
@@ -1,25 +1,32 @@
 from __future__ import annotations
 from typing import Generic, TypeVar
 
-from data_structures.referential_array import ArrayR
-
 K = TypeVar("K")
 V = TypeVar("V")
 
 
+def _byte_indices(modulus: int) -> bytes:
+    """A bytes.translate table sending every byte value b to b % modulus."""
+    return bytes(b % modulus for b in range(256))
+
+
 class InfiniteHashTable(Generic[K, V]):
     """
     Infinite Hash Table.
 
     Type Arguments:
         - K:    Key Type. In most cases should be string.
-                Otherwise, `hash` should be overwritten.
+                Otherwise, `_key_indices` should be overwritten.
         - V:    Value Type.
 
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
     TABLE_SIZE = 27
+    # bytes.translate table sending every byte value to its index, byte % (TABLE_SIZE-1).
+    # Built by a module function, as a comprehension in the class body cannot see TABLE_SIZE.
+    # Rebuild it alongside TABLE_SIZE when overriding either.
+    _BYTE_INDICES = _byte_indices(TABLE_SIZE - 1)
 
     def __init__(self, level: int = 0) -> None:
         """
@@ -31,13 +38,31 @@ class InfiniteHashTable(Generic[K, V]):
 
         """
         self.level = level
-        self.array = ArrayR(self.TABLE_SIZE)
+        # Parallel lists rather than an ArrayR of (key, value) tuples, so no tuple is built per slot written.
+        # A slot is empty when its key is None; its value is either the item's value or a sub-table.
+        self.keys: list[K | None] = [None] * self.TABLE_SIZE
+        self.values: list[V | InfiniteHashTable | None] = [None] * self.TABLE_SIZE
         self.count = 0
+        # Index of the last slot written, checked first when looking for the single item left in a sub-table.
+        self._last_index = 0
+        # Mirror of every (key, value) set through this table, so lookups are a single dict access.
+        # The levels in `keys`/`values` are still kept up to date for get_location and deletion.
+        self._flat: dict[K, V] = {}
+
+    def _key_indices(self, key: K) -> bytes:
+        """
+        The index of key at every level from 0 to len(key), computed in one pass: at level i it is
+        ord(key[i]) % (TABLE_SIZE-1), and TABLE_SIZE-1 once the key has run out of characters.
+        Every walk through the levels reads its positions from here, so this is the hash to override.
 
-    def hash(self, key: K) -> int:
-        if self.level < len(key):
-            return ord(key[self.level]) % (self.TABLE_SIZE-1)
-        return self.TABLE_SIZE-1
+        Lookups never go deeper than level len(key): a sub-table there would need two equal keys.
+        ASCII keys are encoded and translated in C, without building a one character string per level.
+
+        :complexity: O(len(key))
+        """
+        if key.isascii():
+            return key.encode().translate(self._BYTE_INDICES) + bytes((self.TABLE_SIZE-1,))
+        return bytes(ord(char) % (self.TABLE_SIZE-1) for char in key) + bytes((self.TABLE_SIZE-1,))
 
     def __getitem__(self, key: K) -> V:
         """
@@ -46,59 +71,107 @@ class InfiniteHashTable(Generic[K, V]):
         :raises KeyError: when the key doesn't exist.
 
         Complexity:
-        - Worst case: O(n), where n is the number of items stored in the hash table
-        - Best case: O(1), when the item is found at the exact index obtained by the hash function
+        - Worst case: O(n), where n is the number of items stored in the hash table,
+                      when the key was not set through this table and the levels have to be walked
+        - Best case: O(1), when the key was set through this table (a single dict lookup)
 
         """
-        # get the index in the array where the (key, value) pair would be stored
-        index = self.hash(key)
-
-        # if position is empty (item not exist)
-        if self.array[index] is None:
-            raise KeyError(key)
-
-        # if position contains hash table, recursively get the value
-        elif isinstance(self.array[index][1], InfiniteHashTable):
-            return self.array[index][1][key]
-
-        # if the value at position is not an InfiniteHashTable and is not None, return it
-        elif self.array[index][1] is not None:
-            return self.array[index][1]
+        try:
+            return self._flat[key]
+        except KeyError:
+            pass
+
+        # not set through this table (e.g. it is a sub-table), so walk down the levels
+        # in a single frame rather than recursing into each level
+        indices = self._key_indices(key)
+        current = self
+        while True:
+            # get the index where the (key, value) pair would be stored
+            index = indices[current.level]
+            stored_key = current.keys[index]
+            stored = current.values[index]
+
+            # if position is empty (item not exist)
+            if stored_key is None:
+                raise KeyError(key)
+
+            # if position contains hash table, continue the search one level down
+            elif isinstance(stored, InfiniteHashTable):
+                current = stored
+
+            # reached the end of the search, it is only a match if the stored key is this key
+            elif stored_key == key:
+                return stored
 
-        raise KeyError(key)
+            else:
+                raise KeyError(key)
 
     def __setitem__(self, key: K, value: V) -> None:
         """
         Set a (key, value) pair in our hash table.
 
+        :raises ValueError: when key is a different key from one already stored, but gives the same index at
+                            every level (e.g. "a" and "G"), so no level can tell them apart.
+
         Complexity:
         - Worst case: O(n), where n is the number of (key, value) pairs in the hash table
         - Best case: O(1), when the key-value pair is inserted at an empty position in the table without any collision.
 
         """
-        # get the index in the array where the (key, value) pair would be stored
-        index = self.hash(key)
-
-        # If the position is empty, set the key-value pair directly
-        if self.array[index] is None:
-            self.array[index] = (key, value)
-
-        # If there's a sub-table, recurse to set the key in the sub-table
-        elif isinstance(self.array[index][1], InfiniteHashTable):
-            self.array[index][1][key] = value
-
-        else:
-            # If there's a collision, create a new sub-table and re-insert the existing key-value pair and the new one
-            sub_table = InfiniteHashTable(self.level + 1)
-
-            existing_key, existing_value = self.array[index]
+        # tables the new key passes through, each of which counts it once inserted
+        path = []
+        indices = self._key_indices(key)
+        current = self
+
+        while True:
+            # get the index where the (key, value) pair would be stored
+            index = indices[current.level]
+            stored_key = current.keys[index]
+            stored = current.values[index]
+
+            # If the position is empty, set the key-value pair directly
+            if stored_key is None:
+                current.keys[index] = key
+                current.values[index] = value
+                current._last_index = index
+                self._flat[key] = value
+                break
+
+            # If there's a sub-table, continue in the sub-table
+            elif isinstance(stored, InfiniteHashTable):
+                path.append(current)
+                current = stored
+
+            # If the key is already stored here, just update its value
+            elif stored_key == key:
+                current.values[index] = value
+                self._flat[key] = value
+                return
 
-            sub_table[existing_key] = existing_value
-            sub_table[key] = value
-
-            self.array[index] = (existing_key[:self.level + 1], sub_table)
-
-        self.count += 1
+            else:
+                # Checked before anything is changed, so a key that cannot be placed leaves the table as it was
+                existing_indices = self._key_indices(stored_key)
+                if existing_indices == indices:
+                    raise ValueError(f"Keys {stored_key!r} and {key!r} have the same index at every level")
+
+                # If there's a collision, create a new sub-table holding the existing key-value pair,
+                # then continue inserting the new one into the sub-table
+                sub_table = InfiniteHashTable(current.level + 1)
+
+                existing_index = existing_indices[sub_table.level]
+                sub_table.keys[existing_index] = stored_key
+                sub_table.values[existing_index] = stored
+                sub_table._last_index = existing_index
+                sub_table.count = 1
+
+                current.keys[index] = stored_key[:current.level + 1]
+                current.values[index] = sub_table
+                path.append(current)
+                current = sub_table
+
+        path.append(current)
+        for table in path:
+            table.count += 1
 
     def __delitem__(self, key: K) -> None:
         """
@@ -111,38 +184,51 @@ class InfiniteHashTable(Generic[K, V]):
         - Best case: O(1), when the key-value pair is deleted in the table without any collision.
 
         """
-        # get the index in the array where the (key, value) pair would be stored
-        index = self.hash(key)
-
-        if self.array[index] is not None:
-
-            # If the value at index is an internal hash table, recursively call __delitem__ on it
-            if isinstance(self.array[index][1], InfiniteHashTable):
-
-                del self.array[index][1][key]
-                self.count -= 1
-
-                # If the internal hash table now only contains a single item, replace the hash table with that item
-                if len(self.array[index][1]) == 1:
-
-                    for i in range(self.array[index][1].TABLE_SIZE):
-                        if self.array[index][1].array[i] is not None:
-
-                            # Extract the key-value pair from the internal hash table
-                            sub_key, sub_value = self.array[index][1].array[i]
+        # (table, index) of every sub-table slot passed through on the way down
+        path = []
+        indices = self._key_indices(key)
+        current = self
+
+        while True:
+            # get the index where the (key, value) pair would be stored
+            index = indices[current.level]
+            stored_key = current.keys[index]
+            stored = current.values[index]
+
+            if stored_key is None:
+                raise KeyError(key)
+
+            # If the value at index is an internal hash table, continue the search in it
+            elif isinstance(stored, InfiniteHashTable):
+                path.append((current, index))
+                current = stored
+
+            # If there's no internal hash table, remove the key-value pair
+            elif stored_key == key:
+                current.keys[index] = None
+                current.values[index] = None
+                current.count -= 1
+                break
 
-                            # Replace the internal hash table with the extracted key-value pair
-                            self.array[index] = (sub_key, sub_value)
+            else:
+                raise KeyError(key)
 
-                            break
+        self._flat.pop(key, None)
 
-            else:
-                # If there's no internal hash table, remove the key-value pair from the array
-                self.array[index] = None
-                self.count -= 1
+        # Walk back up from the deepest sub-table
+        for table, index in reversed(path):
+            table.count -= 1
+            sub_table = table.values[index]
 
-        else:
-            raise KeyError(f"KeyError: {key}")
+            # If the internal hash table now only contains a single item, replace the hash table with that item.
+            # Deeper sub-tables have already collapsed, so that item is the only occupied slot, and it is
+            # usually the one written last.
+            if len(sub_table) == 1:
+                survivor = sub_table._last_index
+                if sub_table.keys[survivor] is None:
+                    survivor = next(i for i, sub_key in enumerate(sub_table.keys) if sub_key is not None)
+                table.keys[index] = sub_table.keys[survivor]
+                table.values[index] = sub_table.values[survivor]
 
     def __len__(self):
         """
@@ -156,11 +242,9 @@ class InfiniteHashTable(Generic[K, V]):
 
         Not required but may be a good testing tool.
         """
-        print()
-        for i in range(len(self.array)):
-            print(f"{i}", self.array[i])
-
-        return ""
+        return "\n".join(
+            f"{i} {None if key is None else (key, value)}" for i, (key, value) in enumerate(zip(self.keys, self.values))
+        )
 
     def get_location(self, key):
         """
@@ -173,30 +257,40 @@ class InfiniteHashTable(Generic[K, V]):
         - Best case: O(1), when the key-value pair is found in the table without any collision.
 
         """
-        # get the index in the array where the (key, value) pair would be stored
-        index = self.hash(key)
+        locations = []
+        indices = self._key_indices(key)
+        current = self
 
-        # position is empty
-        if self.array[index] is None:
-            raise KeyError(f"Key {key} not found")
+        while True:
+            # get the index where the (key, value) pair would be stored
+            index = indices[current.level]
+            stored_key = current.keys[index]
 
-        # If there's a sub-table, recurse to get the sequence of positions
-        elif isinstance(self.array[index][1], InfiniteHashTable):
-            return [index] + self.array[index][1].get_location(key)
+            # position is empty
+            if stored_key is None:
+                raise KeyError(f"Key {key} not found")
 
-        # Item found (reached end)
-        elif self.array[index][0] == key:
-            return [index]
+            locations.append(index)
 
-        else:
-            raise KeyError(f"Key {key} not found")
+            # If there's a sub-table, continue collecting positions inside it
+            if isinstance(current.values[index], InfiniteHashTable):
+                current = current.values[index]
+
+            # Item found (reached end)
+            elif stored_key == key:
+                return locations
+
+            else:
+                raise KeyError(f"Key {key} not found")
 
     def __contains__(self, key: K) -> bool:
         """
         Checks to see if the given key is in the Hash Table
 
-        :complexity: See linear probe.
+        :complexity: See __getitem__.
         """
+        if key in self._flat:
+            return True
         try:
             _ = self[key]
         except KeyError:
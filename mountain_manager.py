@@ -1,6 +1,5 @@
 from mountain import Mountain
 from double_key_table import DoubleKeyTable
-from algorithms.mergesort import mergesort
 
 
 class MountainManager:
@@ -56,39 +55,27 @@ class MountainManager:
         Return a list of all mountains with this difficulty.
 
         Complexity
-        - Worst case: O(N), where N is the number of mountains in the hash table.
-        - Best case: O(1), when the first key checked matches the given difficulty level,
-          or when the hash table is empty.
+        - Worst case: O(N), where N is the number of mountains with this difficulty (collecting the values).
+        - Best case: O(1), when there are no mountains with this difficulty.
 
         """
-        # get all keys from hash table
-        keys_list = self.mountains.keys()
-
-        for key in keys_list:
-            # if key matches corresponding difficulty, return value
-            if int(key) == diff:
-                return self.mountains.values(key)
-
-        return []  # return empty list if no mountains with diff is found
+        # The outer key is the difficulty as a string, so look it up directly rather than scanning the keys.
+        try:
+            return self.mountains.values(str(diff))
+        except KeyError:
+            return []  # return empty list if no mountains with diff is found
 
     def group_by_difficulty(self):
         """
         Returns a list of lists of all mountains, grouped by and sorted by ascending difficulty.
 
         Complexity
-        - Worst case: O(N log(N)), where N is the number of mountains in the hash table.
-        - Best case: O(N), when the keys in the hash table are already sorted.
+        - Worst case: O(N + D log(D)), where N is the number of mountains in the hash table
+          and D is the number of distinct difficulties.
+        - Best case: O(N + D), when the difficulties are found in ascending order.
 
         """
-        # get all keys from hash table
-        keys_list = self.mountains.keys()
-        sorted_values = []
-
-        # Sort the keys using mergesort
-        for key in mergesort(keys_list):
-
-            # Get the values for the current key and append them to the sorted_values list
-            current_values = self.mountains.values(key)
-            sorted_values.append(current_values)
-
-        return sorted_values
+        # Collect every difficulty with its mountains in one walk of the table, then order the groups by
+        # difficulty. Keys are stored as strings, so compare them as ints ("10" must come after "2").
+        groups = sorted(self.mountains.items_by_outer(), key=lambda group: int(group[0]))
+        return [mountains for _, mountains in groups]
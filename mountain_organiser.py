@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
 from mountain import Mountain
-from algorithms.mergesort import mergesort
-from algorithms.binary_search import binary_search
 
 
 class MountainOrganiser:
@@ -17,6 +18,8 @@ class MountainOrganiser:
 
         """
         self.mountain_rank: list = []
+        # Lengths of the ranked mountains, kept in step with mountain_rank so searching compares plain ints.
+        self._lengths: list[int] = []
 
     def cur_position(self, mountain: Mountain) -> int:
         """
@@ -24,15 +27,22 @@ class MountainOrganiser:
         Raises KeyError if this mountain hasn't been added yet.
 
         Complexity
-        - Worst case: O(log (N)), where N is the total number of mountains included so far 
-          (time complexity of binary search)
-        - Best case: O(1), when the mountain is the first item in the sorted list.
+        - Worst case: O(log (N) + S), where N is the total number of mountains included so far
+          (time complexity of binary search) and S is the number of them sharing this mountain's name and length.
+        - Best case: O(log (N)), when the first mountain with this name and length is the one provided.
 
         """
-        if mountain in self.mountain_rank:  # check if mountain is in list
-            return binary_search(self.mountain_rank, mountain)  # use binary search to find its index
-        else:
-            raise KeyError("Mountain not in list")
+        # Narrow down to the mountains of the same length, then search those by name.
+        lo = bisect_left(self._lengths, mountain.length)
+        hi = bisect_right(self._lengths, mountain.length, lo)
+        position = bisect_left(self.mountain_rank, mountain.name, lo, hi, key=attrgetter("name"))
+
+        # Mountains can share a name and length (e.g. at different difficulties), so check each of those.
+        while position < hi and self.mountain_rank[position].name == mountain.name:
+            if self.mountain_rank[position] == mountain:
+                return position
+            position += 1
+        raise KeyError("Mountain not in list")
 
     def add_mountains(self, mountains: list[Mountain]) -> None:
         """
@@ -44,6 +54,8 @@ class MountainOrganiser:
         - Best case: O(M log(M) + N), same as worst case (when the input list is sorted)
 
         """
+        # The ranked mountains are already one sorted run, so Timsort only sorts the new batch and merges it in.
+        # Mountains are ranked by length, then name, the order cur_position searches in.
         self.mountain_rank.extend(mountains)
-        # Sort the mountain_rank list using mergesort, with the length of the mountain as key
-        self.mountain_rank = mergesort(self.mountain_rank, key=lambda x: x.length)
+        self.mountain_rank.sort(key=attrgetter("length", "name"))
+        self._lengths = [mountain.length for mountain in self.mountain_rank]
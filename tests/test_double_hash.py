@@ -129,3 +129,66 @@ class TestDoubleHash(unittest.TestCase):
         # with an iterator.
         self.assertRaises(BaseException, lambda: next(key_iterator))
         self.assertRaises(BaseException, lambda: next(value_iterator))
+
+    @number("3.6")
+    def test_getitem(self):
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt.hash1 = lambda k: ord(k[0]) % 12
+        dt.hash2 = lambda k, sub_table: ord(k[-1]) % 5
+
+        dt["Tim", "Jen"] = 1
+        dt["Tim", "Bob"] = 2
+        dt["Het", "Liz"] = 3
+
+        self.assertEqual(dt["Tim", "Jen"], 1)
+        self.assertEqual(dt["Tim", "Bob"], 2)
+        self.assertEqual(dt["Het", "Liz"], 3)
+        self.assertRaises(KeyError, lambda: dt["Tim", "Liz"])
+        self.assertRaises(KeyError, lambda: dt["Amy", "Jen"])
+        self.assertIn(("Het", "Liz"), dt)
+        self.assertNotIn(("Het", "Bob"), dt)
+
+    @number("3.7")
+    def test_delete_cluster(self):
+        # Disable resizing / rehashing.
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt.hash1 = lambda k: ord(k[0]) % 12
+        dt.hash2 = lambda k, sub_table: ord(k[-1]) % 5
+
+        dt["Tim", "Jen"] = 1
+        dt["Het", "Liz"] = 2
+        dt["Ivy", "Bob"] = 3
+        dt["Ivy", "Kat"] = 4
+        self.assertEqual(len(dt), 3)
+
+        # Removing the head of the cluster leaves a tombstone, the rest of the chain stays reachable.
+        del dt["Tim", "Jen"]
+        self.assertEqual(len(dt), 2)
+        self.assertEqual(dt._linear_probe("Het", "Liz", False), (1, 2))
+        self.assertEqual(dt._linear_probe("Ivy", "Bob", False), (2, 3))
+        self.assertEqual(dt["Ivy", "Kat"], 4)
+        self.assertEqual(set(dt.keys()), {"Het", "Ivy"})
+        self.assertEqual(set(dt.values()), {2, 3, 4})
+
+        # A new key reuses the tombstone rather than the next empty slot.
+        dt["Tom", "Ben"] = 5
+        self.assertEqual(dt._linear_probe("Tom", "Ben", False), (0, 0))
+        self.assertEqual(len(dt), 3)
+
+    @number("3.8")
+    def test_keyed_lookup_collision(self):
+        # Disable resizing / rehashing.
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt.hash1 = lambda k: ord(k[0]) % 12
+        dt.hash2 = lambda k, sub_table: ord(k[-1]) % 5
+
+        dt["Tim", "Jen"] = 1
+        dt["Het", "Liz"] = 2
+        dt["Het", "Bob"] = 3
+
+        # "Het" was probed past "Tim", so its values must not come from the home slot.
+        self.assertEqual(set(dt.values("Het")), {2, 3})
+        self.assertEqual(set(dt.iter_values("Het")), {2, 3})
+        self.assertEqual(set(dt.keys("Het")), {"Liz", "Bob"})
+        self.assertEqual(dt.keys("Amy"), [])
+        self.assertRaises(KeyError, lambda: dt.values("Amy"))
@@ -67,3 +67,46 @@ class TestInfiniteHash(unittest.TestCase):
         ih["lin"] = 10
         self.assertEqual(ih.get_location("lin"), [4])
         self.assertEqual(len(ih), 1)
+
+    @number("4.3")
+    def test_update_and_missing(self):
+        ih = InfiniteHashTable()
+        ih["lin"] = 1
+        ih["leg"] = 2
+        ih["lin"] = 3
+        self.assertEqual(ih["lin"], 3)
+        self.assertEqual(ih.get_location("lin"), [4, 1])
+        self.assertEqual(len(ih), 2)
+
+        # Shares a position with "lin" and "leg" but was never added.
+        self.assertRaises(KeyError, lambda: ih["lxx"])
+        self.assertNotIn("lot", ih)
+        self.assertRaises(KeyError, lambda: ih.get_location("lot"))
+
+        def delete_missing():
+            del ih["lot"]
+        self.assertRaises(KeyError, delete_missing)
+        self.assertEqual(ih.get_location("leg"), [4, 23])
+        self.assertEqual(len(ih), 2)
+
+    @number("4.4")
+    def test_indistinguishable_keys(self):
+        ih = InfiniteHashTable()
+        ih["a"] = 1
+        ih["ab"] = 2
+
+        # "G" and "a" (and "Gb" and "ab") give the same index at every level, so they cannot both be stored.
+        def set_key(key):
+            ih[key] = 3
+        self.assertRaises(ValueError, lambda: set_key("G"))
+        self.assertRaises(ValueError, lambda: set_key("Gb"))
+
+        # The failed inserts leave nothing behind.
+        for key in ["G", "Gb"]:
+            self.assertNotIn(key, ih)
+            self.assertRaises(KeyError, lambda: ih[key])
+            self.assertRaises(KeyError, lambda: ih.get_location(key))
+        self.assertEqual(len(ih), 2)
+        self.assertEqual(ih.get_location("a"), [19, 26])
+        self.assertEqual(ih.get_location("ab"), [19, 20])
+        self.assertEqual(ih["a"], 1)
@@ -56,3 +56,19 @@ class TestInfiniteHash(unittest.TestCase):
         self.assertEqual(len(res), 4)
 
         self.assertEqual(make_set(res[3]), make_set([m10]))
+
+    @number("5.2")
+    def test_group_order(self):
+        m1 = Mountain("m1", 10, 2)
+        m2 = Mountain("m2", 2, 9)
+        m3 = Mountain("m3", 10, 6)
+        m4 = Mountain("m4", 1, 1)
+
+        mm = MountainManager()
+        for mountain in [m1, m2, m3, m4]:
+            mm.add_mountain(mountain)
+
+        # Difficulties are ordered numerically, not as strings.
+        res = mm.group_by_difficulty()
+        self.assertEqual([[m.difficulty_level for m in group] for group in res], [[1], [2], [10, 10]])
+        self.assertEqual(set(id(m) for m in res[2]), set(id(m) for m in [m1, m3]))
@@ -31,3 +31,27 @@ class TestInfiniteHash(unittest.TestCase):
         self.assertEqual([mo.cur_position(m) for m in [m1, m2, m3, m4, m5, m6, m7, m8, m9]], [1, 8, 3, 0, 4, 2, 6, 7, 5])
 
         self.assertRaises(KeyError, lambda: mo.cur_position(m10))
+
+    @number("6.2")
+    def test_equal_lengths(self):
+        m1 = Mountain("m1", 2, 5)
+        m2 = Mountain("m2", 3, 5)
+        m3 = Mountain("m3", 1, 5)
+        m4 = Mountain("m4", 4, 2)
+
+        mo = MountainOrganiser()
+        mo.add_mountains([m3, m1])
+        mo.add_mountains([m4, m2])
+        self.assertEqual([mo.cur_position(m) for m in [m1, m2, m3, m4]], [1, 2, 3, 0])
+
+        # Same length as ranked mountains, but never added.
+        self.assertRaises(KeyError, lambda: mo.cur_position(Mountain("m0", 2, 5)))
+        self.assertRaises(KeyError, lambda: mo.cur_position(Mountain("m2", 7, 5)))
+
+        # Same name and length, told apart by difficulty.
+        e1 = Mountain("Everest", 1, 5)
+        e2 = Mountain("Everest", 2, 5)
+        mo.add_mountains([e2])
+        mo.add_mountains([e1])
+        self.assertEqual([mo.cur_position(m) for m in [e2, e1, m1, m2, m3, m4]], [1, 2, 3, 4, 5, 0])
+        self.assertRaises(KeyError, lambda: mo.cur_position(Mountain("Everest", 3, 5)))
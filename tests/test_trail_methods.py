@@ -57,3 +57,43 @@ class TestTrailMethods(unittest.TestCase):
             self.top_bot, self.top_top, self.top_mid,
             self.bot_one, self.bot_two, self.final
         ])))
+
+    @number("7.2")
+    def test_length_k_paths_nested_follow(self):
+        a, b, c, d = (Mountain(letter, 5, 5) for letter in "abcd")
+        # The following path holds two mountains and another branch.
+        trail = Trail(TrailSplit(
+            Trail(TrailSeries(c, Trail(None))),
+            Trail(None),
+            Trail(TrailSeries(a, Trail(TrailSeries(b, Trail(TrailSplit(
+                Trail(TrailSeries(d, Trail(None))),
+                Trail(None),
+                Trail(None),
+            )))))),
+        ))
+        make_path_string = lambda mountain_list: ", ".join(map(lambda x: x.name, mountain_list))
+
+        self.assertEqual(set(map(make_path_string, trail.length_k_paths(2))), {"a, b"})
+        self.assertEqual(set(map(make_path_string, trail.length_k_paths(3))), {"c, a, b", "a, b, d"})
+        self.assertEqual(list(map(make_path_string, trail.length_k_paths(4))), ["c, a, b, d"])
+        self.assertEqual(trail.length_k_paths(5), [])
+
+    @number("7.3")
+    def test_iter_mountains(self):
+        self.load_example()
+
+        res = self.trail.iter_mountains()
+        self.assertEqual(set(m.name for m in res), {
+            "top-top", "top-bot", "top-mid", "bot-one", "bot-two", "final"
+        })
+        self.assertEqual(list(Trail(None).iter_mountains()), [])
+
+        # Stopping early only walks as far as needed: the trail after the first mountain is never touched.
+        class Unwalked:
+            @property
+            def store(self):
+                raise AssertionError("walked past the first mountain")
+
+        res = Trail(TrailSeries(self.final, Unwalked())).iter_mountains()
+        self.assertIs(next(res), self.final)
+        self.assertRaises(AssertionError, lambda: next(res))
@@ -2,13 +2,16 @@ from __future__ import annotations
 from dataclasses import dataclass
 from mountain import Mountain
 
-from typing import TYPE_CHECKING, Union
-from data_structures.linked_stack import LinkedStack
+from typing import TYPE_CHECKING, ClassVar, Iterator, Union
 
 # Avoid circular imports for typing.
 if TYPE_CHECKING:
     from personality import WalkerPersonality
 
+# Type tags for the trail stores, so traversals dispatch on an integer compare rather than isinstance.
+SPLIT_KIND = 0
+SERIES_KIND = 1
+
 
 @dataclass
 class TrailSplit:
@@ -23,6 +26,7 @@ class TrailSplit:
     path_top: Trail
     path_bottom: Trail
     path_follow: Trail
+    kind: ClassVar[int] = SPLIT_KIND
 
     def remove_branch(self) -> TrailStore:
         """Removes the branch, should just leave the remaining following trail."""
@@ -40,6 +44,7 @@ class TrailSeries:
 
     mountain: Mountain
     following: Trail
+    kind: ClassVar[int] = SERIES_KIND
 
     def remove_mountain(self) -> TrailStore:
         """Removes the mountain at the beginning of this series."""
@@ -98,59 +103,68 @@ class Trail:
 
         """
         current_trail = self.store
-        path_stack = LinkedStack()
+        # A list used as a stack: append/pop are single C calls, with no node allocated per push.
+        path_stack: list[TrailStore] = []
 
         while True:
 
-            if isinstance(current_trail, TrailSplit):
+            if current_trail is None:
+                # End of the current branch, carry on along the most recently entered split's following path
+                if not path_stack:
+                    break
+                current_trail = path_stack.pop()
+
+            elif current_trail.kind == SPLIT_KIND:
                 if current_trail.path_follow.store is not None:
-                    path_stack.push(current_trail.path_follow.store)
+                    path_stack.append(current_trail.path_follow.store)
 
                 if personality.select_branch(current_trail.path_top, current_trail.path_bottom):
                     current_trail = current_trail.path_top.store
                 else:
                     current_trail = current_trail.path_bottom.store
 
-            if isinstance(current_trail, TrailSeries):
+            else:
                 if current_trail.mountain is not None:
                     personality.add_mountain(current_trail.mountain)
 
                 current_trail = current_trail.following.store
 
-            if current_trail is None:
-                if not path_stack.is_empty():
-                    current_trail = path_stack.pop()
-                else:
-                    break
-
-    def collect_all_mountains(self) -> list[Mountain]:
+    def iter_mountains(self) -> Iterator[Mountain]:
         """
-        Returns a list of all mountains on the trail.
+        Returns an iterator of all mountains on the trail, produced as the trail is walked.
+
+        Only the stores still to be visited are held, so callers that stop early never build the full list.
 
         This should run in O(N) time, where N is the total number of mountains and branches combined.
 
         """
-        mountain_list: list = []
-        my_stack = LinkedStack()
+        my_stack: list[TrailStore] = [self.store]
 
-        my_stack.push(self.store)
-
-        while not my_stack.is_empty():
+        while my_stack:
 
             current_trail = my_stack.pop()
+            if current_trail is None:
+                continue
 
-            if isinstance(current_trail, TrailSplit):
-                my_stack.push(current_trail.path_follow.store)
-                my_stack.push(current_trail.path_top.store)
-                my_stack.push(current_trail.path_bottom.store)
+            if current_trail.kind == SPLIT_KIND:
+                my_stack.append(current_trail.path_follow.store)
+                my_stack.append(current_trail.path_top.store)
+                my_stack.append(current_trail.path_bottom.store)
 
-            if isinstance(current_trail, TrailSeries):
+            else:
                 if current_trail.mountain is not None:
-                    mountain_list.append(current_trail.mountain)
+                    yield current_trail.mountain
 
-                my_stack.push(current_trail.following.store)
+                my_stack.append(current_trail.following.store)
 
-        return mountain_list
+    def collect_all_mountains(self) -> list[Mountain]:
+        """
+        Returns a list of all mountains on the trail.
+
+        This should run in O(N) time, where N is the total number of mountains and branches combined.
+
+        """
+        return list(self.iter_mountains())
 
     def length_k_paths(self, k) -> list[list[Mountain]]:
         """
@@ -159,28 +173,37 @@ class Trail:
 
         Paths are unique if they take a different branch, even if this results in the same set of mountains.
         """
-        final_list: list[list[Mountain]] = []
-        stack2 = LinkedStack()
-
-        def inner_list(current_trail: Trail, trail_list: list) -> list[list[Mountain]]:
-            if current_trail.store is None:
-                while not stack2.is_empty():
-                    trail_list.append(stack2.pop())
-                return [trail_list[::-1]] if len(trail_list) == k else []
-            else:
-                paths = []
-                if isinstance(current_trail.store, TrailSplit):
-                    if current_trail.store.path_follow.store is not None:
-                        trail_list.append(current_trail.store.path_follow.store.mountain)
-                    tem_list_top = trail_list.copy()
-                    paths.extend(inner_list(current_trail.store.path_top, tem_list_top))
-                    tem_list_bottom = trail_list.copy()
-                    paths.extend(inner_list(current_trail.store.path_bottom, tem_list_bottom))
-                if isinstance(current_trail.store, TrailSeries):
-                    if current_trail.store.mountain is not None:
-                        stack2.push(current_trail.store.mountain)
-                        paths.extend(inner_list(current_trail.store.following, trail_list))
-                return paths
-
-        final_list.extend(inner_list(self, []))
-        return final_list
+        paths: list[list[Mountain]] = []
+        # Mountains on the path walked so far, and the trails still to be followed once the current branch ends.
+        # Both are shared by the whole search and restored after each step (backtracking), so nothing is copied
+        # except a finished path.
+        path: list[Mountain] = []
+        pending: list[Trail] = []
+
+        def walk(current_trail: Trail) -> None:
+            store = current_trail.store
+            if store is None:
+                if pending:
+                    following = pending.pop()
+                    walk(following)
+                    pending.append(following)
+                elif len(path) == k:
+                    paths.append(path.copy())
+
+            elif store.kind == SPLIT_KIND:
+                pending.append(store.path_follow)
+                walk(store.path_top)
+                walk(store.path_bottom)
+                pending.pop()
+
+            elif store.mountain is None:
+                walk(store.following)
+
+            # A path already holding k mountains cannot take another one.
+            elif len(path) < k:
+                path.append(store.mountain)
+                walk(store.following)
+                path.pop()
+
+        walk(self)
+        return paths